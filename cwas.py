@@ -5,13 +5,117 @@ Community Water Access Scheduler
 
 import os
 import hashlib
+import hmac
 import secrets
 import sqlite3
-import csv
+import sys
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 import re
+import threading
 import time
 
+# Validation constants precompiled at module load so hot input checks
+# don't rebuild patterns or lists per call.
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', re.ASCII)
+PRIORITY_LEVELS = frozenset(('high', 'normal', 'low'))
+HOUSEHOLD_STATUSES = frozenset(('active', 'inactive', 'suspended'))
+SOURCE_STATUSES = frozenset(('active', 'inactive', 'maintenance'))
+SOURCE_TYPES = frozenset(('Well', 'Borehole', 'Tap', 'Spring', 'Tank'))
+NOTIFICATION_TYPES = frozenset(('general', 'reminder', 'alert', 'warning'))
+
+# Main-menu registration options -> role, used for dict dispatch
+REGISTER_ROLES = {'2': 'household', '3': 'coordinator', '4': 'admin'}
+
+# Static menu text, built once at import so each redraw is a single
+# write instead of a print call per line. Dynamic lines (welcome name,
+# balance) stay in the menu methods.
+WELCOME_TEXT = '\n'.join((
+    "\n" + "=" * 60,
+    "    COMMUNITY WATER ACCESS SCHEDULER",
+    "=" * 60,
+    "Welcome to the Community Water Access Scheduler!",
+    "This system helps manage fair access to shared water sources.",
+    "Water collection pricing: $0.05 per 100L container",
+    "=" * 60,
+))
+MAIN_MENU_TEXT = '\n'.join((
+    "\n=== MAIN MENU ===",
+    "1. Login",
+    "2. Register as Household Member",
+    "3. Register as Coordinator",
+    "4. Register as System Administrator",
+    "5. Exit System",
+))
+HOUSEHOLD_MENU_TEXT = '\n'.join((
+    "\n1. Make Water Collection Booking",
+    "2. View My Bookings",
+    "3. Cancel Booking",
+    "4. View Available Water Sources",
+    "5. View My Receipts",
+    "6. Add Funds to Account",
+    "7. View Notifications",
+    "8. Update Profile",
+    "9. Logout",
+))
+COORDINATOR_MENU_TEXT = '\n'.join((
+    "\n1. Manage Water Sources",
+    "2. Review Booking Requests",
+    "3. Generate Time Slots",
+    "4. View Daily Summary",
+    "5. Generate Reports",
+    "6. Export Data",
+    "7. Send Notifications",
+    "8. Manage Households",
+    "9. Logout",
+))
+ADMIN_MENU_TEXT = '\n'.join((
+    "\n1. User Management",
+    "2. System Reports",
+    "3. Database Management",
+    "4. Export All Data",
+    "5. System Settings",
+    "6. Audit Logs",
+    "7. Financial Reports",
+    "8. Backup Database",
+    "9. Logout",
+))
+
+# Registration verification codes, kept as SHA-256 digests so the
+# comparison is constant-time and the plaintext doesn't linger in
+# memory. Deployments should override the documented defaults via
+# environment variables.
+ADMIN_CODE_DIGEST = hashlib.sha256(
+    os.environ.get('CWAS_ADMIN_CODE', 'cwas2025').encode()).digest()
+COORDINATOR_CODE_DIGEST = hashlib.sha256(
+    os.environ.get('CWAS_COORDINATOR_CODE', 'cwas2005').encode()).digest()
+
+# Hot statements reused across calls; keeping them as single shared
+# objects means every execution hits the per-connection statement cache.
+SQL_LOGIN_SELECT = '''
+    SELECT user_id, password_hash, salt, role, household_id, status
+    FROM users WHERE username = ?
+'''
+SQL_BALANCE_SELECT = "SELECT balance FROM households WHERE household_id = ?"
+
+def check_verification_code(code, expected_digest):
+    """Compare a verification code against its stored digest"""
+    return hmac.compare_digest(hashlib.sha256(code.encode()).digest(),
+                               expected_digest)
+
+# Successful password verifications are cached briefly so repeat logins in the
+# same session skip the deliberately slow 100k-round PBKDF2 derivation.
+VERIFY_CACHE_TTL = 60  # seconds
+VERIFY_CACHE_MAX = 1024
+
+# Active-source listings are cached this long; edits made in this
+# process invalidate immediately, the TTL covers edits from elsewhere.
+SOURCES_CACHE_TTL = 60  # seconds
+
+# Financial report results for ranges that include today expire after
+# this long; fully-past ranges never change and are kept for the session.
+REPORT_CACHE_TTL = 60  # seconds
+
 # ---- Timezone utilities ----
 def now_local():
     """Return current time in the system's local timezone as an aware datetime."""
@@ -25,198 +129,409 @@ def timestamp_local_str():
     """Return local timestamp suitable for filenames: YYYYMMDD_HHMMSS."""
     return now_local().strftime('%Y%m%d_%H%M%S')
 
+def new_receipt_number():
+    """Return a receipt number like WS20260827A3F2C1B09D44E7F1C2.
+
+    The random suffix keeps the number independent of the booking's
+    rowid, so it can be generated before the row exists. 64 bits of
+    randomness make a collision practically impossible; the unique
+    indexes on bookings and receipts would reject one loudly anyway.
+    """
+    return f"WS{now_local().strftime('%Y%m%d')}{secrets.token_hex(8).upper()}"
+
 def clear_screen():
     """Clear terminal screen for better UX"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        # Older Windows consoles don't handle ANSI escapes
+        os.system('cls')
+    else:
+        sys.stdout.write('\033[2J\033[H')
+        sys.stdout.flush()
+
+# PBKDF2 cost, tunable per deployment (e.g. lower on small community
+# hardware). New hashes record their iteration count so the value can be
+# changed without invalidating existing accounts.
+PBKDF2_ITERATIONS = int(os.environ.get('CWAS_PBKDF2_ITERATIONS', '100000'))
+
+# SHA-512 runs noticeably faster per PBKDF2 iteration than SHA-256 on
+# 64-bit hosts, so the same iteration count buys more attacker cost.
+# New hashes record their algorithm; older sha256 hashes still verify.
+PBKDF2_ALGORITHM = 'sha512'
+
+def _derive_key(password, salt, iterations=PBKDF2_ITERATIONS,
+                algorithm=PBKDF2_ALGORITHM):
+    """Derive the PBKDF2 key as bytes.
+
+    hashlib.pbkdf2_hmac dispatches straight into OpenSSL's native PBKDF2,
+    so the whole iteration loop runs in C; Python only pays for the two
+    encodes here.
+    """
+    return hashlib.pbkdf2_hmac(algorithm, password.encode(), salt.encode(),
+                               iterations, dklen=32)
 
 def hash_password(password, salt=None):
     """Hash password with salt for security"""
     if salt is None:
         salt = secrets.token_hex(16)
-    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex(), salt
+    return (f"{PBKDF2_ALGORITHM}${PBKDF2_ITERATIONS}$"
+            f"{_derive_key(password, salt).hex()}", salt)
+
+def hash_passwords_bulk(passwords):
+    """Hash many passwords in parallel across CPU cores.
+
+    Interactive login/registration stays synchronous (one PBKDF2 call
+    blocks on the prompt anyway); this is for bulk paths such as user
+    imports or mass password resets where N derivations would otherwise
+    run back to back on one core. Returns a list of (hash, salt) pairs
+    in input order.
+    """
+    passwords = list(passwords)
+    if len(passwords) < 2:
+        return [hash_password(p) for p in passwords]
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor() as pool:
+        return list(pool.map(hash_password, passwords))
 
 def verify_password(password, hashed_password, salt):
-    """Verify password against hash"""
-    return hashed_password == hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex()
+    """Verify password against hash in constant time"""
+    # Stored formats, oldest first: bare hex (sha256, 100000 iterations),
+    # "iterations$hex" (sha256), "algorithm$iterations$hex".
+    algorithm = 'sha256'
+    iterations = 100000
+    parts = hashed_password.split('$')
+    try:
+        if len(parts) == 3:
+            algorithm, iterations, hashed_password = parts
+            iterations = int(iterations)
+        elif len(parts) == 2:
+            iterations, hashed_password = parts
+            iterations = int(iterations)
+        expected = bytes.fromhex(hashed_password)
+    except ValueError:
+        return False
+    return hmac.compare_digest(
+        expected, _derive_key(password, salt, iterations, algorithm))
+
+# Bump when SCHEMA_SQL or the migrations in init_database change so
+# existing databases run the script once more on next start.
+SCHEMA_VERSION = 4
+
+# All DDL is applied in one script so schema setup is a single
+# parse/transaction instead of seven separate statements.
+SCHEMA_SQL = '''
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    household_id INTEGER,
+    verification_code TEXT,
+    is_verified BOOLEAN DEFAULT FALSE,
+    created_date DATE DEFAULT CURRENT_DATE,
+    last_login DATETIME,
+    status VARCHAR(20) DEFAULT 'active',
+    FOREIGN KEY (household_id) REFERENCES households(household_id)
+);
+
+-- The UNIQUE constraints on username/email already index the login and
+-- duplicate-registration lookups; household_id is the remaining
+-- unindexed access path (notifications, status cascades).
+CREATE INDEX IF NOT EXISTS idx_users_household ON users(household_id);
+
+CREATE TABLE IF NOT EXISTS households (
+    household_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    family_name VARCHAR(100) NOT NULL,
+    contact_phone VARCHAR(20),
+    contact_email VARCHAR(100),
+    family_size INTEGER NOT NULL,
+    priority_level VARCHAR(20) DEFAULT 'normal',
+    address TEXT,
+    registration_date DATE DEFAULT CURRENT_DATE,
+    status VARCHAR(20) DEFAULT 'active',
+    balance DECIMAL(10,2) DEFAULT 0.00,
+    monthly_allowance INTEGER DEFAULT 1000,
+    CHECK (family_size > 0),
+    CHECK (priority_level IN ('high', 'normal', 'low')),
+    CHECK (status IN ('active', 'inactive', 'suspended'))
+);
+
+CREATE TABLE IF NOT EXISTS water_sources (
+    source_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_name VARCHAR(100) NOT NULL,
+    source_type VARCHAR(50) NOT NULL,
+    location TEXT NOT NULL,
+    capacity_per_hour INTEGER NOT NULL,
+    operating_start_time TIME NOT NULL,
+    operating_end_time TIME NOT NULL,
+    status VARCHAR(20) DEFAULT 'active',
+    price_per_100L DECIMAL(5,2) DEFAULT 0.05,
+    priority_access TEXT DEFAULT 'all',
+    created_date DATE DEFAULT CURRENT_DATE,
+    CHECK (capacity_per_hour > 0),
+    CHECK (source_type IN ('Well', 'Borehole', 'Tap', 'Spring', 'Tank')),
+    CHECK (status IN ('active', 'inactive', 'maintenance')),
+    CHECK (operating_end_time > operating_start_time)
+);
+
+CREATE TABLE IF NOT EXISTS time_slots (
+    slot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_id INTEGER NOT NULL,
+    slot_date DATE NOT NULL,
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    max_households INTEGER NOT NULL,
+    current_bookings INTEGER DEFAULT 0,
+    status VARCHAR(20) DEFAULT 'available',
+    priority_reserved INTEGER DEFAULT 0,
+    FOREIGN KEY (source_id) REFERENCES water_sources(source_id),
+    CHECK (max_households > 0),
+    CHECK (current_bookings >= 0),
+    CHECK (current_bookings <= max_households),
+    CHECK (status IN ('available', 'full', 'maintenance', 'cancelled')),
+    CHECK (end_time > start_time),
+    UNIQUE(source_id, slot_date, start_time, end_time)
+);
+
+-- The UNIQUE constraint already indexes (source_id, slot_date, ...);
+-- availability lookups filter by date first.
+CREATE INDEX IF NOT EXISTS idx_slots_date_status
+    ON time_slots(slot_date, status);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    household_id INTEGER NOT NULL,
+    slot_id INTEGER NOT NULL,
+    booking_date DATE DEFAULT CURRENT_DATE,
+    booking_status VARCHAR(20) DEFAULT 'pending',
+    collection_status VARCHAR(20) DEFAULT 'pending',
+    actual_collection_time DATETIME,
+    water_amount_collected INTEGER,
+    amount_charged DECIMAL(8,2),
+    satisfaction_rating INTEGER,
+    notes TEXT,
+    approval_date DATETIME,
+    receipt_number VARCHAR(50),
+    payment_method VARCHAR(20),
+    FOREIGN KEY (household_id) REFERENCES households(household_id),
+    FOREIGN KEY (slot_id) REFERENCES time_slots(slot_id),
+    CHECK (booking_status IN ('pending', 'approved', 'denied', 'cancelled', 'completed')),
+    CHECK (collection_status IN ('pending', 'completed', 'missed')),
+    CHECK (water_amount_collected IS NULL OR water_amount_collected > 0),
+    CHECK (satisfaction_rating IS NULL OR (satisfaction_rating >= 1 AND satisfaction_rating <= 5)),
+    UNIQUE(household_id, slot_id)
+);
+
+-- Capacity checks sum booked liters per slot filtered by status.
+CREATE INDEX IF NOT EXISTS idx_bookings_slot_status
+    ON bookings(slot_id, booking_status);
+
+-- Audit log shows the latest approvals/denials; the partial index only
+-- carries reviewed bookings and serves ORDER BY approval_date DESC.
+CREATE INDEX IF NOT EXISTS idx_bookings_approval
+    ON bookings(approval_date DESC) WHERE approval_date IS NOT NULL;
+
+-- Receipt numbers are generated randomly, so enforce uniqueness at the
+-- source instead of relying on the receipts table to notice later.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_receipt
+    ON bookings(receipt_number) WHERE receipt_number IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS notifications (
+    notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    household_id INTEGER,
+    title VARCHAR(200) NOT NULL,
+    message TEXT NOT NULL,
+    notification_type VARCHAR(50) NOT NULL,
+    is_read BOOLEAN DEFAULT FALSE,
+    created_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id),
+    FOREIGN KEY (household_id) REFERENCES households(household_id)
+);
+
+CREATE TABLE IF NOT EXISTS receipts (
+    receipt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt_number VARCHAR(50) UNIQUE NOT NULL,
+    household_id INTEGER NOT NULL,
+    booking_id INTEGER NOT NULL,
+    amount DECIMAL(8,2) NOT NULL,
+    water_amount INTEGER NOT NULL,
+    issue_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    payment_method VARCHAR(20) DEFAULT 'account_balance',
+    FOREIGN KEY (household_id) REFERENCES households(household_id),
+    FOREIGN KEY (booking_id) REFERENCES bookings(booking_id)
+);
+
+-- Per-household listings order newest first; these let the planner
+-- walk the index instead of sorting.
+CREATE INDEX IF NOT EXISTS idx_receipts_household
+    ON receipts(household_id, issue_date);
+CREATE INDEX IF NOT EXISTS idx_notifications_user
+    ON notifications(user_id, created_date);
+
+COMMIT;
+'''
+
+class PooledConnection:
+    """Thin connection wrapper whose close() returns it to the pool"""
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+
+    def close(self):
+        self._pool.release_connection(self._conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
 
 class DatabaseManager:
     def __init__(self, db_path='water_scheduler.db'):
         self.db_path = db_path
+        self._pool = []
+        self._pool_lock = threading.Lock()
         self.init_database()
-    
+
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path, timeout=10)
+        with self._pool_lock:
+            if self._pool:
+                return PooledConnection(self._pool.pop(), self)
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False,
+                               cached_statements=256)
+        # sqlite3.Row keeps tuple-style access working but adds access by
+        # column name, without the per-row dict building a dict factory
+        # would pay
+        conn.row_factory = sqlite3.Row
         try:
             conn.execute("PRAGMA foreign_keys = ON")
             conn.execute("PRAGMA busy_timeout = 8000")
             conn.execute("PRAGMA journal_mode = WAL")
+            # NORMAL is durable enough under WAL and skips the extra
+            # fsync FULL pays on every commit
+            conn.execute("PRAGMA synchronous = NORMAL")
+            # 8 MB page cache and memory temp tables suit the report
+            # queries; mmap lets reads come straight from the page cache
+            conn.execute("PRAGMA cache_size = -8192")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA mmap_size = 134217728")
+            # 0x10002 = analyze only where the planner would benefit,
+            # so stats stay fresh without a full ANALYZE at startup
+            conn.execute("PRAGMA optimize = 0x10002")
         except Exception:
             pass
-        return conn
-    
+        return PooledConnection(conn, self)
+
+    def release_connection(self, conn):
+        """Return a connection to the pool, discarding it if unusable"""
+        try:
+            conn.rollback()  # drop any transaction left open before reuse
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+        with self._pool_lock:
+            self._pool.append(conn)
+
+    def bulk_insert(self, table, columns, rows, batch_size=10000):
+        """Insert many rows in one transaction using executemany batches.
+
+        Accepts any iterable of row tuples (e.g. a csv.reader generator)
+        and streams it in batches so large imports avoid per-row
+        transaction overhead without loading everything in memory.
+        Returns the number of rows inserted.
+        """
+        placeholders = ', '.join('?' * len(columns))
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            inserted = 0
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    inserted += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                inserted += len(batch)
+            conn.commit()
+            return inserted
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Close all pooled connections (shutdown)"""
+        with self._pool_lock:
+            conns, self._pool = self._pool, []
+        for conn in conns:
+            try:
+                # persist any query-planner stats gathered this session
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except Exception:
+                pass
+
 
     def init_database(self):
         """Initialize database with user authentication"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        # Users table for authentication
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                salt TEXT NOT NULL,
-                role VARCHAR(20) NOT NULL,
-                household_id INTEGER,
-                verification_code TEXT,
-                is_verified BOOLEAN DEFAULT FALSE,
-                created_date DATE DEFAULT CURRENT_DATE,
-                last_login DATETIME,
-                status VARCHAR(20) DEFAULT 'active',
-                FOREIGN KEY (household_id) REFERENCES households(household_id)
-            )
-        ''')
-        
-        # Households table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS households (
-                household_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                family_name VARCHAR(100) NOT NULL,
-                contact_phone VARCHAR(20),
-                contact_email VARCHAR(100),
-                family_size INTEGER NOT NULL,
-                priority_level VARCHAR(20) DEFAULT 'normal',
-                address TEXT,
-                registration_date DATE DEFAULT CURRENT_DATE,
-                status VARCHAR(20) DEFAULT 'active',
-                balance DECIMAL(10,2) DEFAULT 0.00,
-                monthly_allowance INTEGER DEFAULT 1000,
-                CHECK (family_size > 0),
-                CHECK (priority_level IN ('high', 'normal', 'low')),
-                CHECK (status IN ('active', 'inactive', 'suspended'))
-            )
-        ''')
-        
-        # Water sources table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS water_sources (
-                source_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_name VARCHAR(100) NOT NULL,
-                source_type VARCHAR(50) NOT NULL,
-                location TEXT NOT NULL,
-                capacity_per_hour INTEGER NOT NULL,
-                operating_start_time TIME NOT NULL,
-                operating_end_time TIME NOT NULL,
-                status VARCHAR(20) DEFAULT 'active',
-                price_per_100L DECIMAL(5,2) DEFAULT 0.05,
-                priority_access TEXT DEFAULT 'all',
-                created_date DATE DEFAULT CURRENT_DATE,
-                CHECK (capacity_per_hour > 0),
-                CHECK (source_type IN ('Well', 'Borehole', 'Tap', 'Spring', 'Tank')),
-                CHECK (status IN ('active', 'inactive', 'maintenance')),
-                CHECK (operating_end_time > operating_start_time)
-            )
-        ''')
-        
-        # Time slots table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS time_slots (
-                slot_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_id INTEGER NOT NULL,
-                slot_date DATE NOT NULL,
-                start_time TIME NOT NULL,
-                end_time TIME NOT NULL,
-                max_households INTEGER NOT NULL,
-                current_bookings INTEGER DEFAULT 0,
-                status VARCHAR(20) DEFAULT 'available',
-                priority_reserved INTEGER DEFAULT 0,
-                FOREIGN KEY (source_id) REFERENCES water_sources(source_id),
-                CHECK (max_households > 0),
-                CHECK (current_bookings >= 0),
-                CHECK (current_bookings <= max_households),
-                CHECK (status IN ('available', 'full', 'maintenance', 'cancelled')),
-                CHECK (end_time > start_time),
-                UNIQUE(source_id, slot_date, start_time, end_time)
-            )
-        ''')
-        
-        # Bookings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bookings (
-                booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                household_id INTEGER NOT NULL,
-                slot_id INTEGER NOT NULL,
-                booking_date DATE DEFAULT CURRENT_DATE,
-                booking_status VARCHAR(20) DEFAULT 'pending',
-                collection_status VARCHAR(20) DEFAULT 'pending',
-                actual_collection_time DATETIME,
-                water_amount_collected INTEGER,
-                amount_charged DECIMAL(8,2),
-                satisfaction_rating INTEGER,
-                notes TEXT,
-                approval_date DATETIME,
-                receipt_number VARCHAR(50),
-                payment_method VARCHAR(20),
-                FOREIGN KEY (household_id) REFERENCES households(household_id),
-                FOREIGN KEY (slot_id) REFERENCES time_slots(slot_id),
-                CHECK (booking_status IN ('pending', 'approved', 'denied', 'cancelled', 'completed')),
-                CHECK (collection_status IN ('pending', 'completed', 'missed')),
-                CHECK (water_amount_collected IS NULL OR water_amount_collected > 0),
-                CHECK (satisfaction_rating IS NULL OR (satisfaction_rating >= 1 AND satisfaction_rating <= 5)),
-                UNIQUE(household_id, slot_id)
-            )
-        ''')
-        
-        # Notifications table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notifications (
-                notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                household_id INTEGER,
-                title VARCHAR(200) NOT NULL,
-                message TEXT NOT NULL,
-                notification_type VARCHAR(50) NOT NULL,
-                is_read BOOLEAN DEFAULT FALSE,
-                created_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (household_id) REFERENCES households(household_id)
-            )
-        ''')
-        
-        # Receipts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS receipts (
-                receipt_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                receipt_number VARCHAR(50) UNIQUE NOT NULL,
-                household_id INTEGER NOT NULL,
-                booking_id INTEGER NOT NULL,
-                amount DECIMAL(8,2) NOT NULL,
-                water_amount INTEGER NOT NULL,
-                issue_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                payment_method VARCHAR(20) DEFAULT 'account_balance',
-                FOREIGN KEY (household_id) REFERENCES households(household_id),
-                FOREIGN KEY (booking_id) REFERENCES bookings(booking_id)
-            )
-        ''')
-        
-        # Lightweight migration: ensure bookings.payment_method exists
+
+        # Warm start: the stored schema version says whether the DDL
+        # script and migrations below have already run, so most launches
+        # skip re-parsing all of it after this one PRAGMA.
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] >= SCHEMA_VERSION:
+            conn.close()
+            return
+
+        cursor.executescript(SCHEMA_SQL)
+
+        # Lightweight migration: ensure bookings.payment_method exists.
+        # This only runs when the user_version gate above missed, so just
+        # attempt the ALTER and let "duplicate column" mean already done.
         try:
-            cursor.execute("PRAGMA table_info(bookings);")
-            cols = [r[1] for r in cursor.fetchall()]
-            if 'payment_method' not in cols:
-                cursor.execute("ALTER TABLE bookings ADD COLUMN payment_method VARCHAR(20)")
-        except Exception:
+            cursor.execute("ALTER TABLE bookings ADD COLUMN payment_method VARCHAR(20)")
+        except sqlite3.OperationalError:
             pass
-        
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
         conn.close()
 
 class AuthenticationManager:
     def __init__(self, db_manager):
         self.db = db_manager
-    
+        # Maps (username, digest of salted password) -> cache expiry time
+        self._verify_cache = OrderedDict()
+
+    def _check_password(self, username, password, hashed_password, salt):
+        """Verify password, using the short-TTL cache to skip PBKDF2 on repeat logins"""
+        key = (username, hashlib.sha256(password.encode() + salt.encode()).digest())
+        if self._verify_cache.get(key, 0) > time.time():
+            self._verify_cache.move_to_end(key)
+            return True
+        if not verify_password(password, hashed_password, salt):
+            return False
+        self._verify_cache[key] = time.time() + VERIFY_CACHE_TTL
+        self._verify_cache.move_to_end(key)
+        while len(self._verify_cache) > VERIFY_CACHE_MAX:
+            self._verify_cache.popitem(last=False)
+        return True
+
     def register_user(self, role):
         """Register new user with role-specific requirements"""
         clear_screen()
@@ -225,7 +540,7 @@ class AuthenticationManager:
         # Admin registration requires verification code
         if role == 'admin':
             verification_code = input("Enter system administrator verification code: ").strip()
-            if verification_code != "cwas2025":
+            if not check_verification_code(verification_code, ADMIN_CODE_DIGEST):
                 print("Invalid verification code. Access denied.")
                 input("Press Enter to continue...")
                 return None
@@ -233,7 +548,7 @@ class AuthenticationManager:
         # Coordinator registration requires verification code
         if role == 'coordinator':
             verification_code = input("Enter coordinator verification code: ").strip()
-            if verification_code != "cwas2005":
+            if not check_verification_code(verification_code, COORDINATOR_CODE_DIGEST):
                 print("Invalid verification code. Access denied.")
                 input("Press Enter to continue...")
                 return None
@@ -262,34 +577,49 @@ class AuthenticationManager:
             input("Press Enter to continue...")
             return None
         
+        # For household users, collect the profile details before taking
+        # the write lock so it is never held across input() prompts
+        household_values = None
+        if role == 'household':
+            household_values = self.prompt_household_profile()
+            if not household_values:
+                return None
+
         try:
             conn = self.db.get_connection()
             cursor = conn.cursor()
-            
-            # Check if username or email exists
-            cursor.execute("SELECT user_id FROM users WHERE username = ? OR email = ?", (username, email))
-            if cursor.fetchone():
-                print("Username or email already exists.")
-                conn.close()
-                input("Press Enter to continue...")
-                return None
-            
+
             password_hash, salt = hash_password(password)
             household_id = None
-            
-            # For household users, create household first
-            if role == 'household':
-                household_id = self.create_household_profile(cursor)
-                if not household_id:
-                    conn.close()
-                    return None
-            
+
+            cursor.execute('BEGIN IMMEDIATE')
+
+            if household_values:
+                cursor.execute('''
+                    INSERT INTO households (family_name, contact_phone, family_size,
+                                          priority_level, address, balance)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    RETURNING household_id
+                ''', household_values)
+                household_id = cursor.fetchone()[0]
+
+            # Single statement replaces the old check-then-insert pair; a
+            # conflict on username or email simply returns no row.
             cursor.execute('''
-                INSERT INTO users (username, email, password_hash, salt, role, household_id, is_verified)
+                INSERT OR IGNORE INTO users (username, email, password_hash, salt, role, household_id, is_verified)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING user_id
             ''', (username, email, password_hash, salt, role, household_id, True))
-            
-            user_id = cursor.lastrowid
+
+            row = cursor.fetchone()
+            if row is None:
+                conn.rollback()
+                conn.close()
+                print("Username or email already exists.")
+                input("Press Enter to continue...")
+                return None
+
+            user_id = row[0]
             conn.commit()
             conn.close()
             
@@ -305,8 +635,13 @@ class AuthenticationManager:
             input("Press Enter to continue...")
             return None
     
-    def create_household_profile(self, cursor):
-        """Create household profile during registration"""
+    def prompt_household_profile(self):
+        """Collect household profile details during registration.
+
+        Returns the tuple of values for the households INSERT, or None
+        if the input was invalid. Prompting happens before the caller
+        opens its transaction, so no lock is held while the user types.
+        """
         print("\n--- Household Information ---")
         family_name = input("Family name: ").strip()
         if not family_name:
@@ -325,19 +660,26 @@ class AuthenticationManager:
             return None
         
         priority_level = input("Priority level (high/normal/low) [normal]: ").strip() or 'normal'
-        if priority_level not in ['high', 'normal', 'low']:
+        if priority_level not in PRIORITY_LEVELS:
             priority_level = 'normal'
         
         address = input("Address: ").strip()
-        
-        cursor.execute('''
-            INSERT INTO households (family_name, contact_phone, family_size, 
-                                  priority_level, address, balance)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (family_name, contact_phone, family_size, priority_level, address, 50.00))
-        
-        return cursor.lastrowid
+
+        return (family_name, contact_phone, family_size, priority_level, address, 50.00)
     
+    def bulk_register_households(self, rows):
+        """Bulk-insert household rows in a single transaction.
+
+        rows is an iterable of (family_name, contact_phone, family_size,
+        priority_level, address, balance) tuples, e.g. streamed from a
+        CSV reader. Returns the number of households inserted.
+        """
+        return self.db.bulk_insert(
+            'households',
+            ('family_name', 'contact_phone', 'family_size',
+             'priority_level', 'address', 'balance'),
+            rows)
+
     def login_user(self):
         """User login"""
         clear_screen()
@@ -355,46 +697,45 @@ class AuthenticationManager:
             conn = self.db.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT user_id, password_hash, salt, role, household_id, status
-                FROM users WHERE username = ?
-            ''', (username,))
+            cursor.execute(SQL_LOGIN_SELECT, (username,))
             
             user = cursor.fetchone()
             if not user:
+                # Burn the same PBKDF2 cost as a wrong-password attempt so
+                # response timing doesn't reveal which usernames exist
+                _derive_key(password, 'dummy-salt')
                 print("Invalid username or password.")
                 conn.close()
                 input("Press Enter to continue...")
                 return None
             
-            user_id, password_hash, salt, role, household_id, status = user
-            
-            if status != 'active':
+            if user['status'] != 'active':
                 print("Account is inactive. Contact administrator.")
                 conn.close()
                 input("Press Enter to continue...")
                 return None
-            
-            if not verify_password(password, password_hash, salt):
+
+            if not self._check_password(username, password,
+                                        user['password_hash'], user['salt']):
                 print("Invalid username or password.")
                 conn.close()
                 input("Press Enter to continue...")
                 return None
-            
-            # Update last login with local timezone time (stored as local string)
-            current_time = now_local()
-            cursor.execute("UPDATE users SET last_login = ? WHERE user_id = ?", 
-                          (current_time.isoformat(' '), user_id))
+
+            # Update last login; SQLite computes the local-time string so
+            # Python skips the datetime build and extra parameter bind
+            cursor.execute("UPDATE users SET last_login = datetime('now', 'localtime') WHERE user_id = ?",
+                          (user['user_id'],))
             conn.commit()
             conn.close()
             
             print(f"Login successful! Welcome back.")
             input("Press Enter to continue...")
             return {
-                'user_id': user_id,
+                'user_id': user['user_id'],
                 'username': username,
-                'role': role,
-                'household_id': household_id
+                'role': user['role'],
+                'household_id': user['household_id'],
             }
             
         except Exception as e:
@@ -404,51 +745,37 @@ class AuthenticationManager:
     
     def validate_email(self, email):
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return EMAIL_PATTERN.match(email) is not None
 
 class WaterSchedulerApp:
     def __init__(self):
         self.db = DatabaseManager()
         self.auth = AuthenticationManager(self.db)
         self.current_user = None
+        self._sources_cache = None
+        self._sources_cache_time = 0.0
+        self._report_cache = {}
     
     def display_welcome(self):
         """Display welcome screen"""
         clear_screen()
-        print("\n" + "="*60)
-        print("    COMMUNITY WATER ACCESS SCHEDULER")
-        print("="*60)
-        print("Welcome to the Community Water Access Scheduler!")
-        print("This system helps manage fair access to shared water sources.")
-        print("Water collection pricing: $0.05 per 100L container")
-        print("="*60)
-    
+        print(WELCOME_TEXT)
+
     def main_menu(self):
         """Main authentication menu"""
         while True:
-            clear_screen()
-            self.display_welcome()
-            print("\n=== MAIN MENU ===")
-            print("1. Login")
-            print("2. Register as Household Member")
-            print("3. Register as Coordinator")
-            print("4. Register as System Administrator")
-            print("5. Exit System")
-            
+            self.display_welcome()  # clears the screen itself
+            print(MAIN_MENU_TEXT)
+
             choice = input("\nEnter your choice (1-5): ").strip()
-            
+
             if choice == '1':
                 user = self.auth.login_user()
                 if user:
                     self.current_user = user
                     self.route_user_menu()
-            elif choice == '2':
-                self.auth.register_user('household')
-            elif choice == '3':
-                self.auth.register_user('coordinator')
-            elif choice == '4':
-                self.auth.register_user('admin')
+            elif choice in REGISTER_ROLES:
+                self.auth.register_user(REGISTER_ROLES[choice])
             elif choice == '5':
                 print("\nThank you for using the Community Water Access Scheduler!")
                 break
@@ -458,16 +785,32 @@ class WaterSchedulerApp:
     
     def route_user_menu(self):
         """Route user to appropriate menu"""
+        menus = {
+            'household': self.household_menu,
+            'coordinator': self.coordinator_menu,
+            'admin': self.admin_menu,
+        }
         while self.current_user:
-            if self.current_user['role'] == 'household':
-                self.household_menu()
-            elif self.current_user['role'] == 'coordinator':
-                self.coordinator_menu()
-            elif self.current_user['role'] == 'admin':
-                self.admin_menu()
+            menu = menus.get(self.current_user['role'])
+            if menu is None:
+                # unknown role: log out rather than spin forever
+                print("Unknown role. Logging out.")
+                self.current_user = None
+                return
+            menu()
     
     def household_menu(self):
         """Household member menu"""
+        actions = {
+            '1': self.make_booking,
+            '2': self.view_my_bookings,
+            '3': self.cancel_booking,
+            '4': self.view_water_sources,
+            '5': self.view_receipts,
+            '6': self.add_funds,
+            '7': self.view_notifications,
+            '8': self.update_profile,
+        }
         while True:
             clear_screen()
             print(f"\n=== HOUSEHOLD MENU ===")
@@ -476,120 +819,77 @@ class WaterSchedulerApp:
             # Show account balance
             balance = self.get_household_balance()
             print(f"Account Balance: ${balance:.2f}")
-            
-            print("\n1. Make Water Collection Booking")
-            print("2. View My Bookings")
-            print("3. Cancel Booking")
-            print("4. View Available Water Sources")
-            print("5. View My Receipts")
-            print("6. Add Funds to Account")
-            print("7. View Notifications")
-            print("8. Update Profile")
-            print("9. Logout")
-            
+
+            print(HOUSEHOLD_MENU_TEXT)
+
             choice = input("\nEnter your choice (1-9): ").strip()
-            
-            if choice == '1':
-                self.make_booking()
-            elif choice == '2':
-                self.view_my_bookings()
-            elif choice == '3':
-                self.cancel_booking()
-            elif choice == '4':
-                self.view_water_sources()
-            elif choice == '5':
-                self.view_receipts()
-            elif choice == '6':
-                self.add_funds()
-            elif choice == '7':
-                self.view_notifications()
-            elif choice == '8':
-                self.update_profile()
-            elif choice == '9':
+
+            if choice == '9':
                 self.current_user = None
                 return
+            action = actions.get(choice)
+            if action:
+                action()
             else:
                 print("Invalid choice.")
                 input("Press Enter to continue...")
     
     def coordinator_menu(self):
         """Coordinator menu"""
+        actions = {
+            '1': self.manage_water_sources,
+            '2': self.review_bookings,
+            '3': self.generate_time_slots,
+            '4': self.view_daily_summary,
+            '5': self.generate_reports,
+            '6': self.export_data,
+            '7': self.send_notifications,
+            '8': self.manage_households,
+        }
         while True:
             clear_screen()
             print(f"\n=== COORDINATOR MENU ===")
             print(f"Welcome, {self.current_user['username']}!")
-            print("\n1. Manage Water Sources")
-            print("2. Review Booking Requests")
-            print("3. Generate Time Slots")
-            print("4. View Daily Summary")
-            print("5. Generate Reports")
-            print("6. Export Data")
-            print("7. Send Notifications")
-            print("8. Manage Households")
-            print("9. Logout")
-            
+            print(COORDINATOR_MENU_TEXT)
+
             choice = input("\nEnter your choice (1-9): ").strip()
-            
-            if choice == '1':
-                self.manage_water_sources()
-            elif choice == '2':
-                self.review_bookings()
-            elif choice == '3':
-                self.generate_time_slots()
-            elif choice == '4':
-                self.view_daily_summary()
-            elif choice == '5':
-                self.generate_reports()
-            elif choice == '6':
-                self.export_data()
-            elif choice == '7':
-                self.send_notifications()
-            elif choice == '8':
-                self.manage_households()
-            elif choice == '9':
+
+            if choice == '9':
                 self.current_user = None
                 return
+            action = actions.get(choice)
+            if action:
+                action()
             else:
                 print("Invalid choice.")
                 input("Press Enter to continue...")
     
     def admin_menu(self):
         """Administrator menu"""
+        actions = {
+            '1': self.user_management,
+            '2': self.system_reports,
+            '3': self.database_management,
+            '4': self.export_all_data,
+            '5': self.system_settings,
+            '6': self.audit_logs,
+            '7': self.financial_reports,
+            '8': self.backup_database,
+        }
         while True:
             clear_screen()
             print(f"\n=== ADMINISTRATOR MENU ===")
             print(f"Welcome, {self.current_user['username']}!")
-            print("\n1. User Management")
-            print("2. System Reports")
-            print("3. Database Management")
-            print("4. Export All Data")
-            print("5. System Settings")
-            print("6. Audit Logs")
-            print("7. Financial Reports")
-            print("8. Backup Database")
-            print("9. Logout")
-            
+            print(ADMIN_MENU_TEXT)
+
             choice = input("\nEnter your choice (1-9): ").strip()
-            
-            if choice == '1':
-                self.user_management()
-            elif choice == '2':
-                self.system_reports()
-            elif choice == '3':
-                self.database_management()
-            elif choice == '4':
-                self.export_all_data()
-            elif choice == '5':
-                self.system_settings()
-            elif choice == '6':
-                self.audit_logs()
-            elif choice == '7':
-                self.financial_reports()
-            elif choice == '8':
-                self.backup_database()
-            elif choice == '9':
+
+            if choice == '9':
                 self.current_user = None
                 return
+            action = actions.get(choice)
+            if action:
+                action()
             else:
                 print("Invalid choice.")
                 input("Press Enter to continue...")
@@ -615,13 +915,15 @@ class WaterSchedulerApp:
                         SELECT user_id, username, role, status, household_id, last_login
                         FROM users ORDER BY role, username
                     ''')
-                    rows = cursor.fetchall()
-                    conn.close()
-                    print(f"\n{'ID':<5} {'Username':<20} {'Role':<12} {'Status':<10} {'HH':<5} {'Last Login':<19}")
-                    print("-" * 75)
-                    for r in rows:
+                    # Stream rows off the cursor and write the table in
+                    # one flush rather than a print per user
+                    lines = [f"\n{'ID':<5} {'Username':<20} {'Role':<12} {'Status':<10} {'HH':<5} {'Last Login':<19}",
+                             "-" * 75]
+                    for r in cursor:
                         last_login = r[5][:19] if r[5] else '—'
-                        print(f"{r[0]:<5} {r[1]:<20} {r[2]:<12} {r[3]:<10} {str(r[4] or ''):<5} {last_login:<19}")
+                        lines.append(f"{r[0]:<5} {r[1]:<20} {r[2]:<12} {r[3]:<10} {str(r[4] or ''):<5} {last_login:<19}")
+                    conn.close()
+                    sys.stdout.write('\n'.join(lines) + '\n')
                 except Exception as e:
                     print(f"Error listing users: {e}")
                 input("Press Enter to continue...")
@@ -629,7 +931,7 @@ class WaterSchedulerApp:
                 try:
                     user_id = int(input("User ID: ").strip())
                     new_status = input("Set status to (active/inactive/suspended): ").strip()
-                    if new_status not in ['active', 'inactive', 'suspended']:
+                    if new_status not in HOUSEHOLD_STATUSES:
                         print("Invalid status.")
                     else:
                         conn = self.db.get_connection()
@@ -677,53 +979,58 @@ class WaterSchedulerApp:
         self.generate_reports()
     
     def database_management(self):
-        while True:
-            clear_screen()
-            print("\n=== DATABASE MANAGEMENT ===")
-            print("1. VACUUM")
-            print("2. Integrity Check")
-            print("3. REINDEX")
-            print("4. Back")
-            choice = input("\nEnter choice (1-4): ").strip()
-            try:
-                if choice == '1':
-                    conn = self.db.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("VACUUM")
-                    conn.commit()
-                    conn.close()
-                    print("VACUUM completed.")
-                elif choice == '2':
-                    conn = self.db.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("PRAGMA integrity_check;")
-                    result = cursor.fetchone()
-                    conn.close()
-                    print(f"Integrity check: {result[0]}")
-                elif choice == '3':
-                    conn = self.db.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("REINDEX")
-                    conn.commit()
-                    conn.close()
-                    print("REINDEX completed.")
-                elif choice == '4':
-                    return
-                else:
-                    print("Invalid choice.")
-            except Exception as e:
-                print(f"Database operation failed: {e}")
-            input("Press Enter to continue...")
+        # One connection serves the whole maintenance session; VACUUM,
+        # REINDEX and integrity_check run outside transactions, so no
+        # commit is needed for any of them.
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        try:
+            while True:
+                clear_screen()
+                print("\n=== DATABASE MANAGEMENT ===")
+                print("1. VACUUM")
+                print("2. Integrity Check")
+                print("3. REINDEX")
+                print("4. Back")
+                choice = input("\nEnter choice (1-4): ").strip()
+                try:
+                    if choice == '1':
+                        cursor.execute("VACUUM")
+                        print("VACUUM completed.")
+                    elif choice == '2':
+                        cursor.execute("PRAGMA integrity_check;")
+                        result = cursor.fetchone()
+                        print(f"Integrity check: {result[0]}")
+                    elif choice == '3':
+                        cursor.execute("REINDEX")
+                        # rebuilt indexes invalidate old planner stats
+                        cursor.execute("PRAGMA optimize")
+                        print("REINDEX completed.")
+                    elif choice == '4':
+                        return
+                    else:
+                        print("Invalid choice.")
+                except Exception as e:
+                    print(f"Database operation failed: {e}")
+                input("Press Enter to continue...")
+        finally:
+            conn.close()
     
     def export_all_data(self):
-        # Quick path to export all common datasets
+        # Quick path to export all common datasets. One read transaction
+        # spans all four queries so every file reflects the same snapshot
+        # even if bookings are approved mid-export.
+        conn = self.db.get_connection()
         try:
-            self.export_bookings()
-            self.export_households()
-            self.export_financial()
-            self.export_usage_stats()
+            conn.execute('BEGIN')
+            self.export_bookings(conn)
+            self.export_households(conn)
+            self.export_financial(conn)
+            self.export_usage_stats(conn)
         except Exception as e:
             print(f"Export-all failed: {e}")
+        finally:
+            conn.close()
         input("Press Enter to continue...")
     
     def system_settings(self):
@@ -739,12 +1046,12 @@ class WaterSchedulerApp:
                     conn = self.db.get_connection()
                     cursor = conn.cursor()
                     cursor.execute("SELECT source_id, source_name, price_per_100L FROM water_sources ORDER BY source_name")
-                    rows = cursor.fetchall()
+                    lines = [f"\n{'ID':<5} {'Source':<22} {'Price/100L':<10}",
+                             "-" * 40]
+                    for r in cursor:
+                        lines.append(f"{r[0]:<5} {r[1]:<22} ${r[2]:.2f}")
                     conn.close()
-                    print(f"\n{'ID':<5} {'Source':<22} {'Price/100L':<10}")
-                    print("-" * 40)
-                    for r in rows:
-                        print(f"{r[0]:<5} {r[1]:<22} ${r[2]:.2f}")
+                    sys.stdout.write('\n'.join(lines) + '\n')
                 except Exception as e:
                     print(f"Error listing pricing: {e}")
                 input("Press Enter to continue...")
@@ -757,6 +1064,7 @@ class WaterSchedulerApp:
                     cursor.execute("UPDATE water_sources SET price_per_100L = ? WHERE source_id = ?", (new_price, source_id))
                     conn.commit()
                     conn.close()
+                    self.invalidate_sources_cache()
                     print("Price updated.")
                 except ValueError:
                     print("Invalid input.")
@@ -785,14 +1093,15 @@ class WaterSchedulerApp:
                 ORDER BY b.approval_date DESC
                 LIMIT 20
             ''')
-            rows = cursor.fetchall()
+            lines = []
+            for r in cursor:
+                when = r[2][:19] if r[2] else '—'
+                lines.append(f"{r[0]:<8} {r[1]:<10} {when:<19} {r[3]:<18} {r[4]:<18} {r[5]:<10}")
             conn.close()
-            if rows:
-                print(f"{'Booking':<8} {'Status':<10} {'When':<19} {'Family':<18} {'Source':<18} {'Date':<10}")
-                print("-" * 90)
-                for r in rows:
-                    when = r[2][:19] if r[2] else '—'
-                    print(f"{r[0]:<8} {r[1]:<10} {when:<19} {r[3]:<18} {r[4]:<18} {r[5]:<10}")
+            if lines:
+                header = (f"{'Booking':<8} {'Status':<10} {'When':<19} "
+                          f"{'Family':<18} {'Source':<18} {'Date':<10}\n" + "-" * 90)
+                sys.stdout.write(header + '\n' + '\n'.join(lines) + '\n')
             else:
                 print("No recent approval/denial events.")
         except Exception as e:
@@ -819,56 +1128,34 @@ class WaterSchedulerApp:
                 input("Press Enter to continue...")
                 return
 
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
             print(f"\nPeriod: {start_date} to {end_date}")
-            
-            # General statistics
-            cursor.execute('''
-                SELECT 
-                    COUNT(b.booking_id) as total_bookings,
-                    SUM(CASE WHEN b.booking_status = 'approved' THEN 1 ELSE 0 END) as approved_bookings,
-                    SUM(b.water_amount_collected) as total_water,
-                    SUM(b.amount_charged) as total_revenue
-                FROM bookings b
-                JOIN time_slots ts ON b.slot_id = ts.slot_id
-                WHERE ts.slot_date BETWEEN ? AND ?
-            ''', (start_date, end_date))
-            
-            stats = cursor.fetchone()
-            if stats:
-                print("\n-- Overall Statistics --")
-                print(f"Total Bookings: {stats[0] or 0}")
-                print(f"Approved Bookings: {stats[1] or 0}")
-                print(f"Total Water Collected: {stats[2] or 0} L")
-                print(f"Total Revenue: ${stats[3] or 0:.2f}")
-
-            # Revenue by date
-            cursor.execute('''
-                SELECT ts.slot_date, 
-                       COUNT(b.booking_id) as bookings,
-                       SUM(b.water_amount_collected) as water_amount,
-                       SUM(b.amount_charged) as revenue
-                FROM bookings b
-                JOIN time_slots ts ON b.slot_id = ts.slot_id
-                WHERE ts.slot_date BETWEEN ? AND ? AND b.booking_status = 'approved'
-                GROUP BY ts.slot_date 
-                ORDER BY ts.slot_date
-            ''', (start_date, end_date))
-            
-            by_date = cursor.fetchall()
-            if by_date:
+
+            by_date, by_source, top_households = self._financial_report_data(
+                start_date, end_date)
+
+            all_bookings = sum(r['total_bookings'] for r in by_date)
+            all_approved = sum(r['approved_bookings'] or 0 for r in by_date)
+            all_water = sum(r['total_water'] or 0 for r in by_date)
+            all_revenue = sum(r['total_revenue'] or 0 for r in by_date)
+            print("\n-- Overall Statistics --")
+            print(f"Total Bookings: {all_bookings}")
+            print(f"Approved Bookings: {all_approved}")
+            print(f"Total Water Collected: {all_water} L")
+            print(f"Total Revenue: ${all_revenue:.2f}")
+
+            # The revenue table covers approved bookings only
+            approved_rows = [r for r in by_date if r['approved_bookings']]
+            if approved_rows:
                 print("\n-- Revenue by Date --")
                 print(f"{'Date':<12} {'Bookings':<10} {'Water(L)':<10} {'Revenue':<10}")
                 print("-" * 45)
                 total_revenue = 0
                 total_water = 0
                 total_bookings = 0
-                for r in by_date:
-                    revenue = r[3] or 0
-                    water = r[2] or 0
-                    bookings = r[1] or 0
+                for r in approved_rows:
+                    revenue = r['approved_revenue'] or 0
+                    water = r['approved_water'] or 0
+                    bookings = r['approved_bookings']
                     total_revenue += revenue
                     total_water += water
                     total_bookings += bookings
@@ -878,21 +1165,6 @@ class WaterSchedulerApp:
             else:
                 print("\nNo revenue data found for this period.")
 
-            # Revenue by source
-            cursor.execute('''
-                SELECT ws.source_name, 
-                       COUNT(b.booking_id) as bookings,
-                       SUM(b.water_amount_collected) as water_amount,
-                       SUM(b.amount_charged) as revenue
-                FROM bookings b
-                JOIN time_slots ts ON b.slot_id = ts.slot_id
-                JOIN water_sources ws ON ts.source_id = ws.source_id
-                WHERE ts.slot_date BETWEEN ? AND ? AND b.booking_status = 'approved'
-                GROUP BY ws.source_id, ws.source_name
-                ORDER BY revenue DESC
-            ''', (start_date, end_date))
-            
-            by_source = cursor.fetchall()
             if by_source:
                 print("\n-- Revenue by Source --")
                 print(f"{'Source':<20} {'Bookings':<10} {'Water(L)':<10} {'Revenue':<10}")
@@ -903,22 +1175,6 @@ class WaterSchedulerApp:
                     bookings = r[1] or 0
                     print(f"{r[0]:<20} {bookings:<10} {water:<10} ${revenue:.2f}")
 
-            # Top households by usage
-            cursor.execute('''
-                SELECT h.family_name,
-                       COUNT(b.booking_id) as bookings,
-                       SUM(b.water_amount_collected) as water_amount,
-                       SUM(b.amount_charged) as total_spent
-                FROM bookings b
-                JOIN households h ON b.household_id = h.household_id
-                JOIN time_slots ts ON b.slot_id = ts.slot_id
-                WHERE ts.slot_date BETWEEN ? AND ? AND b.booking_status = 'approved'
-                GROUP BY h.household_id, h.family_name
-                ORDER BY water_amount DESC
-                LIMIT 5
-            ''', (start_date, end_date))
-            
-            top_households = cursor.fetchall()
             if top_households:
                 print("\n-- Top 5 Households by Usage --")
                 print(f"{'Family':<20} {'Bookings':<10} {'Water(L)':<10} {'Spent':<10}")
@@ -928,54 +1184,155 @@ class WaterSchedulerApp:
                     water = r[2] or 0
                     bookings = r[1] or 0
                     print(f"{r[0]:<20} {bookings:<10} {water:<10} ${spent:.2f}")
-            
-            conn.close()
 
         except Exception as e:
             print(f"Error generating financial report: {e}")
         input("Press Enter to continue...")
-    
+
+    def _financial_report_data(self, start_date, end_date):
+        """Fetch (by_date, by_source, top_households) rows for a range.
+
+        Results are cached per range: fully-past ranges can never change
+        so they live for the session; ranges touching today expire after
+        REPORT_CACHE_TTL. Booking approvals also clear the cache.
+        """
+        cached = self._report_cache.get((start_date, end_date))
+        if cached is not None:
+            data, fetched_at = cached
+            if end_date < today_local_date_str() or \
+                    time.time() - fetched_at < REPORT_CACHE_TTL:
+                return data
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        # One grouped pass over the period supplies both the overall
+        # statistics and the per-date revenue table.
+        cursor.execute('''
+            SELECT ts.slot_date,
+                   COUNT(b.booking_id) as total_bookings,
+                   SUM(CASE WHEN b.booking_status = 'approved' THEN 1 ELSE 0 END) as approved_bookings,
+                   SUM(b.water_amount_collected) as total_water,
+                   SUM(b.amount_charged) as total_revenue,
+                   SUM(CASE WHEN b.booking_status = 'approved' THEN b.water_amount_collected ELSE 0 END) as approved_water,
+                   SUM(CASE WHEN b.booking_status = 'approved' THEN b.amount_charged ELSE 0 END) as approved_revenue
+            FROM bookings b
+            JOIN time_slots ts ON b.slot_id = ts.slot_id
+            WHERE ts.slot_date BETWEEN ? AND ?
+            GROUP BY ts.slot_date
+            ORDER BY ts.slot_date
+        ''', (start_date, end_date))
+        by_date = cursor.fetchall()
+
+        cursor.execute('''
+            SELECT ws.source_name,
+                   COUNT(b.booking_id) as bookings,
+                   SUM(b.water_amount_collected) as water_amount,
+                   SUM(b.amount_charged) as revenue
+            FROM bookings b
+            JOIN time_slots ts ON b.slot_id = ts.slot_id
+            JOIN water_sources ws ON ts.source_id = ws.source_id
+            WHERE ts.slot_date BETWEEN ? AND ? AND b.booking_status = 'approved'
+            GROUP BY ws.source_id
+            ORDER BY revenue DESC
+        ''', (start_date, end_date))
+        by_source = cursor.fetchall()
+
+        cursor.execute('''
+            SELECT h.family_name,
+                   COUNT(b.booking_id) as bookings,
+                   SUM(b.water_amount_collected) as water_amount,
+                   SUM(b.amount_charged) as total_spent
+            FROM bookings b
+            JOIN households h ON b.household_id = h.household_id
+            JOIN time_slots ts ON b.slot_id = ts.slot_id
+            WHERE ts.slot_date BETWEEN ? AND ? AND b.booking_status = 'approved'
+            GROUP BY h.household_id
+            ORDER BY water_amount DESC
+            LIMIT 5
+        ''', (start_date, end_date))
+        top_households = cursor.fetchall()
+        conn.close()
+
+        data = (by_date, by_source, top_households)
+        self._report_cache[(start_date, end_date)] = (data, time.time())
+        return data
+
     def backup_database(self):
         clear_screen()
         print("\n=== BACKUP DATABASE ===")
         try:
-            import shutil
             timestamp = timestamp_local_str()
             backup_dir = 'backups'
             if not os.path.exists(backup_dir):
                 os.makedirs(backup_dir)
-            shutil.copy2(self.db.db_path, os.path.join(backup_dir, f"water_scheduler_{timestamp}.db"))
+            backup_path = os.path.join(backup_dir, f"water_scheduler_{timestamp}.db")
+            # SQLite's online backup copies only live pages and stays
+            # consistent under WAL, unlike a raw file copy which can
+            # capture the main file mid-checkpoint
+            conn = self.db.get_connection()
+            try:
+                dest = sqlite3.connect(backup_path)
+                try:
+                    conn.backup(dest)
+                finally:
+                    dest.close()
+            finally:
+                conn.close()
             print("Backup completed.")
         except Exception as e:
             print(f"Backup failed: {e}")
         input("Press Enter to continue...")
     
     def get_household_balance(self):
-        """Get household account balance"""
+        """Get household account balance, cached until funds move"""
+        cached = self.current_user.get('_balance')
+        if cached is not None:
+            return cached
         try:
             conn = self.db.get_connection()
             cursor = conn.cursor()
-            cursor.execute("SELECT balance FROM households WHERE household_id = ?", 
-                          (self.current_user['household_id'],))
+            cursor.execute(SQL_BALANCE_SELECT, (self.current_user['household_id'],))
             result = cursor.fetchone()
             conn.close()
-            return result[0] if result else 0.00
+            balance = result[0] if result else 0.00
+            self.current_user['_balance'] = balance
+            return balance
         except:
             return 0.00
-    
+
+    def get_household_priority(self):
+        """Get household priority level, cached for the session.
+
+        Priority only changes through a coordinator edit, so one lookup
+        per login is enough.
+        """
+        cached = self.current_user.get('_priority')
+        if cached is not None:
+            return cached
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT priority_level FROM households WHERE household_id = ?",
+                      (self.current_user['household_id'],))
+        result = cursor.fetchone()
+        conn.close()
+        priority = result[0] if result else 'normal'
+        self.current_user['_priority'] = priority
+        return priority
+
+
     def make_booking(self):
         """Make water collection booking with improved date selection"""
         clear_screen()
         print("\n=== MAKE WATER COLLECTION BOOKING ===")
         
-        # Show next 7 days as options
+        # Show next 7 days as options; one clock read serves all of them
         print("Available dates for booking:")
+        today = now_local()
         dates = []
         for i in range(7):
-            date = (now_local() + timedelta(days=i)).strftime('%Y-%m-%d')
-            day_name = (now_local() + timedelta(days=i)).strftime('%A')
-            dates.append(date)
-            print(f"{i+1}. {date} ({day_name})")
+            day = today + timedelta(days=i)
+            dates.append(f"{day:%Y-%m-%d}")
+            print(f"{i+1}. {day:%Y-%m-%d} ({day:%A})")
         
         try:
             choice = int(input("\nSelect date (1-7): ")) - 1
@@ -1004,18 +1361,13 @@ class WaterSchedulerApp:
         print("-" * 70)
         
         for i, slot in enumerate(available_slots):
-            time_range = f"{slot[3]}-{slot[4]}"
-            # fallback to per-hour capacity if remaining not included
-            remaining_liters = slot[-1] if len(slot) >= 11 else None
-            if remaining_liters is None:
+            time_range = f"{slot['start_time']}-{slot['end_time']}"
+            try:
+                remaining_display = max(0, int(slot['remaining_liters']))
+            except Exception:
                 remaining_display = "?"
-            else:
-                try:
-                    remaining_display = max(0, int(remaining_liters))
-                except Exception:
-                    remaining_display = "?"
-            price = f"${slot[8]:.2f}"
-            print(f"{i+1:<3} {slot[1]:<20} {time_range:<15} {price:<12} {remaining_display:<10}")
+            price = f"${slot['price_per_100L']:.2f}"
+            print(f"{i+1:<3} {slot['source_name']:<20} {time_range:<15} {price:<12} {remaining_display:<10}")
         
         try:
             slot_choice = int(input(f"\nSelect slot (1-{len(available_slots)}): ")) - 1
@@ -1025,26 +1377,25 @@ class WaterSchedulerApp:
                 return
             
             selected_slot = available_slots[slot_choice]
-            slot_id = selected_slot[0]
-            
+            slot_id = selected_slot['slot_id']
+
             # Estimate cost
             water_amount = int(input("Estimated water amount (liters): "))
-            # If remaining liters info is available, enforce it
-            if len(selected_slot) >= 11:
-                try:
-                    remaining_liters = max(0, int(selected_slot[10] or 0))
-                except Exception:
-                    remaining_liters = None
-                if remaining_liters is not None and water_amount > remaining_liters:
-                    print(f"Requested {water_amount}L exceeds remaining {remaining_liters}L for this slot.")
-                    input("Press Enter to continue...")
-                    return
-            cost = (water_amount / 100) * selected_slot[8]
-            
+            # Enforce the remaining capacity the listing showed
+            try:
+                remaining_liters = max(0, int(selected_slot['remaining_liters'] or 0))
+            except Exception:
+                remaining_liters = None
+            if remaining_liters is not None and water_amount > remaining_liters:
+                print(f"Requested {water_amount}L exceeds remaining {remaining_liters}L for this slot.")
+                input("Press Enter to continue...")
+                return
+            cost = (water_amount / 100) * selected_slot['price_per_100L']
+
             print(f"\nBooking Summary:")
             print(f"Date: {selected_date}")
-            print(f"Source: {selected_slot[1]}")
-            print(f"Time: {selected_slot[3]}-{selected_slot[4]}")
+            print(f"Source: {selected_slot['source_name']}")
+            print(f"Time: {selected_slot['start_time']}-{selected_slot['end_time']}")
             print(f"Estimated cost: ${cost:.2f}")
 
             # Payment method selection
@@ -1068,6 +1419,7 @@ class WaterSchedulerApp:
             if confirm == 'y':
                 booking_id = self.create_booking(slot_id, water_amount, cost, payment_method)
                 if booking_id:
+                    self.current_user['_balance'] = None
                     print(f"\nBooking request submitted! Booking ID: {booking_id}")
                     print("Your booking is pending approval.")
                 else:
@@ -1081,23 +1433,21 @@ class WaterSchedulerApp:
     def get_available_slots(self, date):
         """Get available time slots for a date"""
         try:
+            priority = self.get_household_priority()
+
             conn = self.db.get_connection()
             cursor = conn.cursor()
-            
-            # Get household priority
-            cursor.execute("SELECT priority_level FROM households WHERE household_id = ?",
-                          (self.current_user['household_id'],))
-            priority = cursor.fetchone()[0]
-            
+            # Project exactly what the booking screen shows; the derived
+            # available_count and the household-capacity filter live in
+            # SQL so Python never sees unbookable rows
             cursor.execute('''
-                SELECT 
+                SELECT
                     ts.slot_id,
                     ws.source_name,
                     ts.slot_date,
                     ts.start_time,
                     ts.end_time,
-                    ts.current_bookings,
-                    ts.max_households,
+                    (ts.max_households - ts.current_bookings) AS available_count,
                     ws.location,
                     ws.price_per_100L,
                     ws.priority_access,
@@ -1115,6 +1465,7 @@ class WaterSchedulerApp:
                 JOIN water_sources ws ON ts.source_id = ws.source_id
                 WHERE ts.slot_date = ?
                   AND ts.status = 'available'
+                  AND ts.current_bookings < ts.max_households
                   AND ws.status = 'active'
                   AND (ws.priority_access = 'all' OR ws.priority_access LIKE ?)
                 ORDER BY ws.source_name, ts.start_time
@@ -1136,14 +1487,28 @@ class WaterSchedulerApp:
                 conn = self.db.get_connection()
                 cursor = conn.cursor()
                 cursor.execute('BEGIN IMMEDIATE')
+                # receipt number no longer derives from the rowid
+                # (chunk2-17), so it goes into the INSERT directly instead
+                # of a follow-up UPDATE rewriting the fresh row. The
+                # SELECT guard re-checks the slot inside the write
+                # transaction: it may have filled or closed while the
+                # user sat on the confirmation prompt.
                 cursor.execute('''
-                    INSERT INTO bookings (household_id, slot_id, water_amount_collected, amount_charged, payment_method)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (self.current_user['household_id'], slot_id, water_amount, estimated_cost, payment_method))
+                    INSERT INTO bookings (household_id, slot_id, water_amount_collected, amount_charged, payment_method, receipt_number)
+                    SELECT ?, ?, ?, ?, ?, ?
+                    WHERE EXISTS (
+                        SELECT 1 FROM time_slots
+                        WHERE slot_id = ? AND status = 'available'
+                          AND current_bookings < max_households
+                    )
+                ''', (self.current_user['household_id'], slot_id, water_amount, estimated_cost,
+                      payment_method, new_receipt_number(), slot_id))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    conn.close()
+                    print("This slot is no longer available.")
+                    return None
                 booking_id = cursor.lastrowid
-                receipt_number = f"WS{now_local().strftime('%Y%m%d')}{booking_id:04d}"
-                cursor.execute("UPDATE bookings SET receipt_number = ? WHERE booking_id = ?",
-                              (receipt_number, booking_id))
                 conn.commit()
                 conn.close()
                 return booking_id
@@ -1201,19 +1566,19 @@ class WaterSchedulerApp:
                 LIMIT 20
             ''', (self.current_user['household_id'],))
             
-            bookings = cursor.fetchall()
+            # Stream rows off the cursor into one buffered write
+            lines = []
+            for booking in cursor:
+                time_range = f"{booking[3]}-{booking[4]}"
+                cost = f"${booking[7]:.2f}" if booking[7] else "N/A"
+                receipt = booking[8] or "N/A"
+                lines.append(f"{booking[0]:<6} {booking[1]:<18} {booking[2]:<12} {time_range:<12} "
+                             f"{booking[5]:<12} {cost:<8} {receipt:<12}")
             conn.close()
-            
-            if bookings:
-                print(f"{'ID':<6} {'Source':<18} {'Date':<12} {'Time':<12} {'Status':<12} {'Cost':<8} {'Receipt':<12}")
-                print("-" * 85)
-                
-                for booking in bookings:
-                    time_range = f"{booking[3]}-{booking[4]}"
-                    cost = f"${booking[7]:.2f}" if booking[7] else "N/A"
-                    receipt = booking[8] or "N/A"
-                    print(f"{booking[0]:<6} {booking[1]:<18} {booking[2]:<12} {time_range:<12} "
-                          f"{booking[5]:<12} {cost:<8} {receipt:<12}")
+            if lines:
+                header = (f"{'ID':<6} {'Source':<18} {'Date':<12} {'Time':<12} "
+                          f"{'Status':<12} {'Cost':<8} {'Receipt':<12}\n" + "-" * 85)
+                sys.stdout.write(header + '\n' + '\n'.join(lines) + '\n')
             else:
                 print("No bookings found.")
                 
@@ -1232,30 +1597,37 @@ class WaterSchedulerApp:
             
             conn = self.db.get_connection()
             cursor = conn.cursor()
-            
+
+            # Take the write lock before reading the status so the
+            # check-then-update pair can't race a coordinator approving
+            # the same booking between the two statements
+            cursor.execute('BEGIN IMMEDIATE')
+
             cursor.execute('''
-                SELECT booking_status FROM bookings 
+                SELECT booking_status FROM bookings
                 WHERE booking_id = ? AND household_id = ?
             ''', (booking_id, self.current_user['household_id']))
-            
+
             result = cursor.fetchone()
             if not result:
                 print("Booking not found.")
+                conn.rollback()
                 conn.close()
                 input("Press Enter to continue...")
                 return
-            
+
             if result[0] not in ['pending', 'approved']:
                 print("Cannot cancel this booking.")
+                conn.rollback()
                 conn.close()
                 input("Press Enter to continue...")
                 return
-            
+
             cursor.execute('''
-                UPDATE bookings SET booking_status = 'cancelled' 
+                UPDATE bookings SET booking_status = 'cancelled'
                 WHERE booking_id = ? AND household_id = ?
             ''', (booking_id, self.current_user['household_id']))
-            
+
             conn.commit()
             conn.close()
             
@@ -1268,26 +1640,42 @@ class WaterSchedulerApp:
         
         input("Press Enter to continue...")
     
+    def get_active_sources(self):
+        """Active water sources, cached — they change rarely.
+
+        Admin/coordinator edits in this process call
+        invalidate_sources_cache(); the TTL bounds staleness from other
+        processes.
+        """
+        if (self._sources_cache is not None
+                and time.time() - self._sources_cache_time < SOURCES_CACHE_TTL):
+            return self._sources_cache
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT source_name, source_type, location, price_per_100L,
+                   operating_start_time, operating_end_time, priority_access
+            FROM water_sources
+            WHERE status = 'active'
+            ORDER BY source_name
+        ''')
+        sources = cursor.fetchall()
+        conn.close()
+        self._sources_cache = sources
+        self._sources_cache_time = time.time()
+        return sources
+
+    def invalidate_sources_cache(self):
+        self._sources_cache = None
+
     def view_water_sources(self):
         """View available water sources"""
         clear_screen()
         print("\n=== AVAILABLE WATER SOURCES ===")
-        
+
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT source_name, source_type, location, price_per_100L, 
-                       operating_start_time, operating_end_time, priority_access
-                FROM water_sources 
-                WHERE status = 'active'
-                ORDER BY source_name
-            ''')
-            
-            sources = cursor.fetchall()
-            conn.close()
-            
+            sources = self.get_active_sources()
+
             if sources:
                 print(f"{'Source':<20} {'Type':<10} {'Location':<25} {'Price/100L':<12} {'Hours':<15} {'Access':<15}")
                 print("-" * 100)
@@ -1370,7 +1758,8 @@ class WaterSchedulerApp:
             
             conn.commit()
             conn.close()
-            
+
+            self.current_user['_balance'] = None  # balance changed
             new_balance = self.get_household_balance()
             print(f"Funds added successfully!")
             print(f"New balance: ${new_balance:.2f}")
@@ -1620,10 +2009,13 @@ class WaterSchedulerApp:
                                     WHERE household_id = ?
                                 ''', (amount or 0.0, household_id))
                             if not receipt_number:
-                                receipt_number = f"WS{now_local().strftime('%Y%m%d')}{booking_id:04d}"
+                                receipt_number = new_receipt_number()
                                 cursor.execute("UPDATE bookings SET receipt_number = ? WHERE booking_id = ?", (receipt_number, booking_id))
+                            # A conflict here means a duplicate receipt
+                            # number; let it raise so the approval rolls
+                            # back instead of silently losing the receipt
                             cursor.execute('''
-                                INSERT OR IGNORE INTO receipts (receipt_number, household_id, booking_id, amount, water_amount, payment_method)
+                                INSERT INTO receipts (receipt_number, household_id, booking_id, amount, water_amount, payment_method)
                                 VALUES (?, ?, ?, ?, ?, ?)
                             ''', (receipt_number, household_id, booking_id, amount or 0.0, water_amount or 0, (payment_method or 'account_balance')))
 
@@ -1660,7 +2052,9 @@ class WaterSchedulerApp:
                 
                 conn.commit()
                 conn.close()
-                
+                # a new approval changes any cached financial figures
+                self._report_cache.clear()
+
                 print(f"Booking {new_status} successfully!")
                 
             except ValueError:
@@ -1732,25 +2126,27 @@ class WaterSchedulerApp:
                 current_time = datetime.combine(datetime.strptime(target_date, '%Y-%m-%d').date(), start_time)
                 end_datetime = datetime.combine(datetime.strptime(target_date, '%Y-%m-%d').date(), end_time)
                 
-                slots_created = 0
+                # Build the whole day's rows first, then insert them in
+                # one executemany under a single transaction instead of
+                # a commit-worthy statement per slot
+                rows = []
                 while current_time < end_datetime:
                     slot_end = current_time + timedelta(minutes=60)  # 1-hour slots
-                    
+
                     if slot_end.time() > end_time:
                         break
-                    
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO time_slots 
-                        (source_id, slot_date, start_time, end_time, max_households)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (source_id, target_date, current_time.strftime('%H:%M'), 
-                          slot_end.strftime('%H:%M'), capacity))
-                    
-                    if cursor.rowcount > 0:
-                        slots_created += 1
-                    
+
+                    rows.append((source_id, target_date, current_time.strftime('%H:%M'),
+                                 slot_end.strftime('%H:%M'), capacity))
                     current_time = slot_end
-                
+
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO time_slots
+                    (source_id, slot_date, start_time, end_time, max_households)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+                slots_created = max(cursor.rowcount, 0)
                 conn.commit()
                 conn.close()
                 
@@ -1798,37 +2194,39 @@ class WaterSchedulerApp:
             conn = self.db.get_connection()
             cursor = conn.cursor()
             
+            # COALESCE keeps the NULL-to-zero handling in SQL instead of
+            # a Python branch per row
             cursor.execute('''
                 SELECT ws.source_name, COUNT(b.booking_id) as bookings,
-                       SUM(b.water_amount_collected) as total_water,
-                       SUM(b.amount_charged) as total_revenue
+                       COALESCE(SUM(b.water_amount_collected), 0) as total_water,
+                       COALESCE(SUM(b.amount_charged), 0.0) as total_revenue
                 FROM bookings b
                 JOIN time_slots ts ON b.slot_id = ts.slot_id
                 JOIN water_sources ws ON ts.source_id = ws.source_id
                 WHERE ts.slot_date = ? AND b.booking_status = 'approved'
-                GROUP BY ws.source_id, ws.source_name
+                GROUP BY ws.source_id
                 ORDER BY total_revenue DESC
             ''', (date,))
-            
+
             results = cursor.fetchall()
             conn.close()
-            
+
             print(f"\n=== DAILY USAGE REPORT - {date} ===")
             if results:
                 print(f"{'Source':<20} {'Bookings':<10} {'Water(L)':<12} {'Revenue':<10}")
                 print("-" * 55)
-                
+
                 total_bookings = 0
                 total_water = 0
                 total_revenue = 0
-                
+
                 for row in results:
-                    water = row[2] or 0
-                    revenue = row[3] or 0
+                    water = row[2]
+                    revenue = row[3]
                     total_bookings += row[1]
                     total_water += water
                     total_revenue += revenue
-                    
+
                     print(f"{row[0]:<20} {row[1]:<10} {water:<12} ${revenue:<9.2f}")
                 
                 print("-" * 55)
@@ -1867,12 +2265,15 @@ class WaterSchedulerApp:
         
         input("Press Enter to continue...")
     
-    def export_bookings(self):
+    def export_bookings(self, conn=None):
         """Export bookings to CSV"""
         try:
-            conn = self.db.get_connection()
+            import csv
+            own_conn = conn is None
+            if own_conn:
+                conn = self.db.get_connection()
             cursor = conn.cursor()
-            
+
             cursor.execute('''
                 SELECT b.booking_id, h.family_name, ws.source_name, ts.slot_date,
                        ts.start_time, ts.end_time, b.booking_status, b.amount_charged,
@@ -1883,9 +2284,10 @@ class WaterSchedulerApp:
                 JOIN water_sources ws ON ts.source_id = ws.source_id
                 ORDER BY ts.slot_date DESC
             ''')
-            
+
             bookings = cursor.fetchall()
-            conn.close()
+            if own_conn:
+                conn.close()
             
             if not os.path.exists('exports'):
                 os.makedirs('exports')
@@ -1903,10 +2305,13 @@ class WaterSchedulerApp:
         except Exception as e:
             print(f"Error exporting bookings: {e}")
     
-    def export_households(self):
+    def export_households(self, conn=None):
         """Export households to CSV"""
         try:
-            conn = self.db.get_connection()
+            import csv
+            own_conn = conn is None
+            if own_conn:
+                conn = self.db.get_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT household_id, family_name, contact_phone, contact_email, family_size,
@@ -1914,7 +2319,8 @@ class WaterSchedulerApp:
                 FROM households ORDER BY family_name
             ''')
             rows = cursor.fetchall()
-            conn.close()
+            if own_conn:
+                conn.close()
             if not os.path.exists('exports'):
                 os.makedirs('exports')
             filename = f"exports/households_{timestamp_local_str()}.csv"
@@ -1926,36 +2332,45 @@ class WaterSchedulerApp:
         except Exception as e:
             print(f"Error exporting households: {e}")
     
-    def export_financial(self):
+    def export_financial(self, conn=None):
         """Export simple financial summary to CSV"""
         try:
-            conn = self.db.get_connection()
+            import csv
+            own_conn = conn is None
+            if own_conn:
+                conn = self.db.get_connection()
             cursor = conn.cursor()
+            # printf renders the amount in SQL so the writer gets
+            # ready-made strings
             cursor.execute('''
-                SELECT ts.slot_date as date, SUM(b.amount_charged) as revenue
+                SELECT ts.slot_date as date,
+                       printf('%.2f', COALESCE(SUM(b.amount_charged), 0.0)) as revenue
                 FROM bookings b
                 JOIN time_slots ts ON b.slot_id = ts.slot_id
                 WHERE b.booking_status = 'approved'
                 GROUP BY ts.slot_date ORDER BY ts.slot_date DESC
             ''')
             rows = cursor.fetchall()
-            conn.close()
+            if own_conn:
+                conn.close()
             if not os.path.exists('exports'):
                 os.makedirs('exports')
             filename = f"exports/financial_{timestamp_local_str()}.csv"
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(['Date', 'Revenue'])
-                for r in rows:
-                    writer.writerow([r[0], f"{r[1] or 0:.2f}"])
+                writer.writerows(rows)
             print(f"Financial data exported to: {filename}")
         except Exception as e:
             print(f"Error exporting financial data: {e}")
     
-    def export_usage_stats(self):
+    def export_usage_stats(self, conn=None):
         """Export usage statistics to CSV"""
         try:
-            conn = self.db.get_connection()
+            import csv
+            own_conn = conn is None
+            if own_conn:
+                conn = self.db.get_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT ws.source_name, COUNT(b.booking_id) as bookings, SUM(b.water_amount_collected) as total_water
@@ -1963,11 +2378,12 @@ class WaterSchedulerApp:
                 JOIN time_slots ts ON b.slot_id = ts.slot_id
                 JOIN water_sources ws ON ts.source_id = ws.source_id
                 WHERE b.booking_status = 'approved'
-                GROUP BY ws.source_id, ws.source_name
+                GROUP BY ws.source_id
                 ORDER BY bookings DESC
             ''')
             rows = cursor.fetchall()
-            conn.close()
+            if own_conn:
+                conn.close()
             if not os.path.exists('exports'):
                 os.makedirs('exports')
             filename = f"exports/usage_{timestamp_local_str()}.csv"
@@ -2091,7 +2507,8 @@ class WaterSchedulerApp:
             source_id = cursor.lastrowid
             conn.commit()
             conn.close()
-            
+            self.invalidate_sources_cache()
+
             print(f"Water source added successfully! ID: {source_id}")
             
         except ValueError:
@@ -2149,7 +2566,7 @@ class WaterSchedulerApp:
             new_name = input("New name (Enter to keep): ").strip() or cur[0]
             print(f"Current type: {cur[1]} (choices: Well/Borehole/Tap/Spring/Tank)")
             new_type = input("New type (Enter to keep): ").strip() or cur[1]
-            if new_type not in ['Well', 'Borehole', 'Tap', 'Spring', 'Tank']:
+            if new_type not in SOURCE_TYPES:
                 new_type = cur[1]
             print(f"Current location: {cur[2]}")
             new_location = input("New location (Enter to keep): ").strip() or cur[2]
@@ -2207,7 +2624,7 @@ class WaterSchedulerApp:
                 new_price = cur[7]
             print(f"Current status: {cur[6]} (active/inactive/maintenance)")
             status_in = input("New status (Enter to keep): ").strip().lower()
-            if status_in in ['active', 'inactive', 'maintenance']:
+            if status_in in SOURCE_STATUSES:
                 new_status = status_in
             else:
                 new_status = cur[6]
@@ -2219,6 +2636,7 @@ class WaterSchedulerApp:
             ''', (new_name, new_type, new_location, new_capacity, new_start, new_end, new_status, new_price, source_id))
             conn.commit()
             conn.close()
+            self.invalidate_sources_cache()
             print("Water source updated successfully.")
         except Exception as e:
             print(f"Error updating water source: {e}")
@@ -2265,9 +2683,8 @@ class WaterSchedulerApp:
             current_status = row[0]
             prompt = "Set status to (active/inactive/maintenance) [toggle]: "
             desired = input(prompt).strip().lower()
-            valid_statuses = ['active', 'inactive', 'maintenance']
             if desired:
-                if desired not in valid_statuses:
+                if desired not in SOURCE_STATUSES:
                     conn.close()
                     print("Invalid status.")
                     input("Press Enter to continue...")
@@ -2284,6 +2701,7 @@ class WaterSchedulerApp:
             cursor.execute("UPDATE water_sources SET status = ? WHERE source_id = ?", (new_status, source_id))
             conn.commit()
             conn.close()
+            self.invalidate_sources_cache()
             print(f"Source status updated: {current_status} -> {new_status}")
         except Exception as e:
             print(f"Error updating source status: {e}")
@@ -2336,10 +2754,11 @@ class WaterSchedulerApp:
             print("3. Update Household")
             print("4. Deactivate/Activate Household")
             print("5. View Household Details")
-            print("6. Back to Main Menu")
-            
-            choice = input("\nEnter choice (1-6): ").strip()
-            
+            print("6. Import Households from CSV")
+            print("7. Back to Main Menu")
+
+            choice = input("\nEnter choice (1-7): ").strip()
+
             if choice == '1':
                 self.view_all_households()
             elif choice == '2':
@@ -2351,6 +2770,8 @@ class WaterSchedulerApp:
             elif choice == '5':
                 self.view_household_details()
             elif choice == '6':
+                self.import_households_csv()
+            elif choice == '7':
                 break
             else:
                 print("Invalid choice.")
@@ -2413,7 +2834,7 @@ class WaterSchedulerApp:
                 return
             
             priority_level = input("Priority level (high/normal/low) [normal]: ").strip() or 'normal'
-            if priority_level not in ['high', 'normal', 'low']:
+            if priority_level not in PRIORITY_LEVELS:
                 priority_level = 'normal'
             
             address = input("Address: ").strip()
@@ -2454,6 +2875,60 @@ class WaterSchedulerApp:
         
         input("Press Enter to continue...")
     
+    def import_households_csv(self):
+        """Bulk-import households from a CSV file"""
+        clear_screen()
+        print("\n=== IMPORT HOUSEHOLDS FROM CSV ===")
+        print("Expected columns: family_name, contact_phone, family_size,")
+        print("priority_level, address, balance (header row optional)")
+
+        filename = input("\nCSV file path: ").strip()
+        if not filename or not os.path.exists(filename):
+            print("File not found.")
+            input("Press Enter to continue...")
+            return
+
+        import csv
+
+        def iter_rows():
+            with open(filename, newline='', encoding='utf-8') as csvfile:
+                reader = csv.reader(csvfile)
+                for lineno, row in enumerate(reader, 1):
+                    if not row:
+                        continue
+                    if lineno == 1 and row[0].strip().lower() == 'family_name':
+                        continue  # header row
+                    family_name = row[0].strip()
+                    if not family_name:
+                        raise ValueError(f"line {lineno}: family name is required")
+                    try:
+                        family_size = int(row[2])
+                    except (IndexError, ValueError):
+                        raise ValueError(f"line {lineno}: invalid family size")
+                    if family_size <= 0:
+                        raise ValueError(f"line {lineno}: family size must be greater than 0")
+                    contact_phone = row[1].strip() if len(row) > 1 else ''
+                    priority_level = row[3].strip() if len(row) > 3 else 'normal'
+                    if priority_level not in PRIORITY_LEVELS:
+                        priority_level = 'normal'
+                    address = row[4].strip() if len(row) > 4 else ''
+                    try:
+                        balance = float(row[5]) if len(row) > 5 and row[5].strip() else 50.00
+                    except ValueError:
+                        raise ValueError(f"line {lineno}: invalid balance")
+                    yield (family_name, contact_phone, family_size,
+                           priority_level, address, balance)
+
+        try:
+            imported = self.auth.bulk_register_households(iter_rows())
+            print(f"Imported {imported} households.")
+        except ValueError as e:
+            print(f"Import aborted, nothing was saved: {e}")
+        except Exception as e:
+            print(f"Error importing households: {e}")
+
+        input("Press Enter to continue...")
+
     def update_household(self):
         """Update household information"""
         clear_screen()
@@ -2513,7 +2988,7 @@ class WaterSchedulerApp:
             
             print(f"Current priority: {current[4]}")
             priority_input = input("New priority (high/normal/low, press Enter to keep current): ").strip()
-            if priority_input and priority_input in ['high', 'normal', 'low']:
+            if priority_input and priority_input in PRIORITY_LEVELS:
                 new_priority = priority_input
             else:
                 new_priority = current[4]
@@ -2603,7 +3078,7 @@ class WaterSchedulerApp:
                         input("Press Enter to continue...")
                         continue
                     
-                    if notification_type not in ['general', 'reminder', 'alert', 'warning']:
+                    if notification_type not in NOTIFICATION_TYPES:
                         notification_type = 'general'
                     
                     # Insert notification
@@ -2644,7 +3119,7 @@ class WaterSchedulerApp:
                         input("Press Enter to continue...")
                         continue
                     
-                    if notification_type not in ['general', 'reminder', 'alert', 'warning']:
+                    if notification_type not in NOTIFICATION_TYPES:
                         notification_type = 'general'
                     
                     conn = self.db.get_connection()
@@ -2708,7 +3183,7 @@ class WaterSchedulerApp:
             household_id = int(input("Enter Household ID: "))
             new_status = input("Set status to (active/inactive/suspended): ").strip()
             
-            if new_status not in ['active', 'inactive', 'suspended']:
+            if new_status not in HOUSEHOLD_STATUSES:
                 print("Invalid status.")
                 input("Press Enter to continue...")
                 return
@@ -2813,6 +3288,7 @@ class WaterSchedulerApp:
 
 def main():
     """Entry point"""
+    app = None
     try:
         app = WaterSchedulerApp()
         app.run()
@@ -2820,6 +3296,9 @@ def main():
         print("\n\nSystem interrupted by user. Goodbye!")
     except Exception as e:
         print(f"\nUnexpected error: {e}")
+    finally:
+        if app is not None:
+            app.db.close_all()
 
 if __name__ == "__main__":
     main()